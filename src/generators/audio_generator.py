@@ -10,13 +10,25 @@ import soundfile as sf
 from pathlib import Path
 from src.utils.text_normalizer import TextNormalizer
 from src.utils.ensure_output_dir import ensure_output_dirs
+from src.utils.async_writer import AsyncWriter
+from src.utils.model_manager import ModelManager
 
 class AudioGenerator:
-    def __init__(self):
-        """Initialize the audio generator with T5 models"""
+    def __init__(self, model_manager=None, device="cpu"):
+        """
+        Initialize the audio generator with T5 models
+        Args:
+            model_manager (ModelManager): Shared manager that owns the TTS models.
+                                          A private one is created when omitted.
+            device (str): Device the TTS model and vocoder run on
+        """
         self.processor = SpeechT5Processor.from_pretrained("microsoft/speecht5_tts")
-        self.model = SpeechT5ForTextToSpeech.from_pretrained("microsoft/speecht5_tts")
-        self.vocoder = SpeechT5HifiGan.from_pretrained("microsoft/speecht5_hifigan")
+        self.device = device
+        self.owns_manager = model_manager is None
+        self.model_manager = model_manager or ModelManager()
+        self.model_name = "speecht5"
+        if self.model_name not in self.model_manager.entries:
+            self.model_manager.register(self.model_name, self._load_models, device=device)
         
         # Load speaker embeddings
         embeddings_dataset = load_dataset("Matthijs/cmu-arctic-xvectors", split="validation")
@@ -25,50 +37,77 @@ class AudioGenerator:
         self.text_normalizer = TextNormalizer()
         ensure_output_dirs()
 
-    def generate_audio(self, script):
+    def generate_audio(self, script, save_to_disk=True, segment_queue=None):
         """
         Generate audio from script text
         Args:
             script (str): Input text to convert to speech
+            save_to_disk (bool): Also write each chunk as a WAV in the background
+            segment_queue (queue.Queue or SegmentRenderer): Receives ("audio", metadata)
+                for each chunk as soon as it is ready; a SegmentRenderer raises from put()
+                once a segment has failed to render, stopping generation
         Returns:
-            list: List of metadata for generated audio chunks
+            list: List of metadata for generated audio chunks, each holding the
+                  float waveform under "audio"
         """
         sentences = [s.strip() + '.' for s in script.split('.') if s.strip()]
         audio_metadata = []
+        writer = AsyncWriter() if save_to_disk else None
 
-        for i, sentence in enumerate(sentences):
-            print(f"\nGenerating audio for sentence {i+1}/{len(sentences)}:")
-            print(f"Text: {sentence}")
+        with self.model_manager.stage("audio"):
+            model, vocoder = self.model_manager.acquire(self.model_name)
+            try:
+                for i, sentence in enumerate(sentences):
+                    print(f"\nGenerating audio for sentence {i+1}/{len(sentences)}:")
+                    print(f"Text: {sentence}")
 
-            audio_chunk = self._generate_audio_chunk(sentence)
-            audio_path = Path("src/output/audio") / f"chunk_{i}.wav"
-            sf.write(str(audio_path), audio_chunk, samplerate=16000)
-            
-            audio_metadata.append({
-                "chunk_index": i,
-                "text": sentence,
-                "audio_path": str(audio_path),
-                "duration": len(audio_chunk) / 16000
-            })
+                    audio_chunk = self._generate_audio_chunk(model, vocoder, sentence)
+                    audio_path = None
+                    if writer is not None:
+                        audio_path = Path("src/output/audio") / f"chunk_{i}.wav"
+                        writer.submit(sf.write, str(audio_path), audio_chunk, samplerate=16000)
+
+                    meta = {
+                        "chunk_index": i,
+                        "text": sentence,
+                        "audio": audio_chunk,
+                        "sample_rate": 16000,
+                        "audio_path": str(audio_path) if audio_path is not None else None,
+                        "duration": len(audio_chunk) / 16000
+                    }
+                    audio_metadata.append(meta)
+                    if segment_queue is not None:
+                        segment_queue.put(("audio", meta))
+            finally:
+                del model, vocoder
+                # Release the models even if generation fails so the manager can evict them
+                self._cleanup()
+                if writer is not None:
+                    writer.close()
 
-        self._cleanup()
         return audio_metadata
 
-    def _generate_audio_chunk(self, text):
+    def _load_models(self):
+        """Load the TTS model and vocoder; the model manager places them"""
+        model = SpeechT5ForTextToSpeech.from_pretrained("microsoft/speecht5_tts")
+        vocoder = SpeechT5HifiGan.from_pretrained("microsoft/speecht5_hifigan")
+        return model, vocoder
+
+    def _generate_audio_chunk(self, model, vocoder, text):
         """Generate audio for a single chunk of text"""
         normalized_text = self.text_normalizer.normalize_numbers(text)
         
         inputs = self.processor(text=normalized_text, return_tensors="pt", padding=True)
-        speech = self.model.generate_speech(
-            inputs["input_ids"], 
-            self.speaker_embeddings, 
-            vocoder=self.vocoder
+        speech = model.generate_speech(
+            inputs["input_ids"].to(self.device), 
+            self.speaker_embeddings.to(self.device), 
+            vocoder=vocoder
         )
         return speech.squeeze(0).cpu().numpy()
 
     def _cleanup(self):
-        """Clean up GPU memory"""
-        torch.cuda.empty_cache()
-        del self.model
-        del self.vocoder
-        torch.cuda.empty_cache()
\ No newline at end of file
+        """Release the TTS models; a shared manager keeps them warm until the room is needed"""
+        if self.owns_manager:
+            self.model_manager.drop(self.model_name)
+        else:
+            self.model_manager.release(self.model_name)
\ No newline at end of file
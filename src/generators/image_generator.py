@@ -4,94 +4,193 @@ Handles image generation using Stable Diffusion
 """
 
 import torch
+import numpy as np
 from diffusers import DiffusionPipeline, LCMScheduler
 import os
+import shutil
 from src.utils.ensure_output_dir import ensure_output_dirs
+from src.utils.async_writer import AsyncWriter
+from src.utils.model_manager import ModelManager, estimate_size
+from src.utils.scene_grouping import group_sentences, scene_prompt
 from pathlib import Path
 
+# Approximate fp16 SDXL footprints, used to make room before the first load
+SDXL_SIZE_BYTES = 7 * 1024 ** 3
+SDXL_UNET_SIZE_BYTES = 5 * 1024 ** 3
+SEQUENTIAL_OFFLOAD_SIZE_BYTES = 512 * 1024 ** 2
+# Working memory for UNet activations and the full-resolution VAE decode at 1080x1920
+SDXL_RESERVE_BYTES = 4 * 1024 ** 3
+
 class ImageGenerator:
-    def __init__(self, style="pixel"):
+    def __init__(self, style="pixel", model_manager=None, cpu_offload=None):
         """
         Initialize the image generator with specified style
         Args:
             style (str): Either "pixel" or "papercut"
+            model_manager (ModelManager): Shared manager that owns the pipeline.
+                                          A private one is created when omitted.
+            cpu_offload (str): None to keep SDXL fully on the GPU, "model" to
+                               move whole components on demand, or "sequential"
+                               to stream submodules (smallest footprint, slowest)
         """
+        if cpu_offload not in (None, "model", "sequential"):
+            raise ValueError(f"Unknown cpu_offload mode: {cpu_offload}")
+
         self.style = style
-        self.image_generator = DiffusionPipeline.from_pretrained(
+        self.cpu_offload = cpu_offload
+        self.owns_manager = model_manager is None
+        self.model_manager = model_manager or ModelManager()
+        self.model_name = f"sdxl_{style}"
+
+        if self.model_name not in self.model_manager.entries:
+            if cpu_offload is None:
+                self.model_manager.register(
+                    self.model_name, self._load_pipeline, size_bytes=SDXL_SIZE_BYTES,
+                    reserve_bytes=SDXL_RESERVE_BYTES
+                )
+            else:
+                # Offload hooks place components themselves; the pipeline must not be moved
+                self.model_manager.register(
+                    self.model_name,
+                    self._load_pipeline,
+                    size_bytes=SDXL_UNET_SIZE_BYTES if cpu_offload == "model" else SEQUENTIAL_OFFLOAD_SIZE_BYTES,
+                    reserve_bytes=SDXL_RESERVE_BYTES,
+                    offloadable=False,
+                    move_fn=lambda pipe, device: pipe,
+                    size_fn=self._offloaded_size
+                )
+        ensure_output_dirs()
+
+    def _load_pipeline(self):
+        """Load SDXL on CPU with the style adapters; the model manager places it"""
+        pipe = DiffusionPipeline.from_pretrained(
             "stabilityai/stable-diffusion-xl-base-1.0",
             torch_dtype=torch.float16,
             use_safetensors=True,
             variant="fp16"
-        ).to("cuda")
-        
-        self._setup_model()
-        ensure_output_dirs()
+        )
+        self._setup_model(pipe)
 
-    def _setup_model(self):
+        if self.cpu_offload == "model":
+            pipe.enable_model_cpu_offload()
+        elif self.cpu_offload == "sequential":
+            pipe.enable_sequential_cpu_offload()
+        return pipe
+
+    def _offloaded_size(self, pipe):
+        """Device footprint under CPU offload: the largest component at a time"""
+        if self.cpu_offload == "sequential":
+            return 0
+        return max(estimate_size(c) for c in pipe.components.values())
+
+    def _setup_model(self, pipe):
         """Set up the model with appropriate style and configurations"""
-        self.image_generator.scheduler = LCMScheduler.from_config(
-            self.image_generator.scheduler.config
+        pipe.scheduler = LCMScheduler.from_config(
+            pipe.scheduler.config
         )
-        self.image_generator.load_lora_weights(
+        pipe.load_lora_weights(
             "latent-consistency/lcm-lora-sdxl",
             adapter_name="lcm"
         )
         
         if self.style == "pixel":
-            self.image_generator.load_lora_weights(
+            pipe.load_lora_weights(
                 "nerijs/pixel-art-xl",
                 adapter_name="pixel"
             )
-            self.image_generator.set_adapters(
+            pipe.set_adapters(
                 ["lcm", "pixel"],
                 adapter_weights=[1.0, 1.2]
             )
         elif self.style == "papercut":
-            self.image_generator.load_lora_weights(
+            pipe.load_lora_weights(
                 "TheLastBen/Papercut_SDXL",
                 weight_name="papercut.safetensors",
                 adapter_name="papercut"
             )
-            self.image_generator.set_adapters(
+            pipe.set_adapters(
                 ["lcm", "papercut"],
                 adapter_weights=[1.0, 0.8]
             )
 
-    def generate_images(self, script):
+    def generate_images(self, script, save_to_disk=True, scene_grouping=None, group_size=2, segment_queue=None):
         """
         Generate images from script text
         Args:
             script (str): Input text to generate images from
+            save_to_disk (bool): Also write each image as a PNG in the background
+            scene_grouping (str): None for one image per sentence, "consecutive"
+                                  to share one image across group_size consecutive
+                                  sentences, or "cluster" to share it across
+                                  similar sentences
+            group_size (int): Target number of sentences per scene
+            segment_queue (queue.Queue or SegmentRenderer): Receives ("image", metadata)
+                for each sentence as soon as its image is ready; a SegmentRenderer raises from put()
+                once a segment has failed to render, stopping generation
         Returns:
-            list: List of metadata for generated images
+            list: List of metadata per sentence, each holding the BGR image array
+                  under "image" plus its "scene_index" and "scene_position"
         """
         sentences = [s.strip() + '.' for s in script.split('.') if s.strip()]
+        scene_indices = group_sentences(sentences, scene_grouping, group_size)
+        num_scenes = max(scene_indices) + 1 if scene_indices else 0
         image_metadata = []
+        writer = AsyncWriter() if save_to_disk else None
 
-        for i, sentence in enumerate(sentences):
-            print(f"\nGenerating image for sentence {i+1}/{len(sentences)}:")
-            print(f"Text: {sentence}")
-            
-            image = self._generate_image_chunk(sentence)
-            image_path = Path("src/output/images") / f"chunk_{i}.png"
-            image.save(image_path)
-            
-            image_metadata.append({
-                "chunk_index": i,
-                "text": sentence,
-                "image_path": str(image_path)
-            })
-        
-        self._cleanup()
+        with self.model_manager.stage("images"):
+            pipe = self.model_manager.acquire(self.model_name)
+            try:
+                for scene in range(num_scenes):
+                    members = [i for i, s in enumerate(scene_indices) if s == scene]
+                    scene_text = scene_prompt([sentences[i] for i in members])
+                    print(f"\nGenerating image for scene {scene+1}/{num_scenes} (sentences {[i+1 for i in members]}):")
+                    print(f"Text: {scene_text}")
+
+                    image = self._generate_image_chunk(pipe, scene_text)
+                    image_array = np.ascontiguousarray(np.asarray(image.convert("RGB"))[:, :, ::-1])
+                    # One file per sentence keeps the image directory aligned with the audio chunks
+                    image_paths = [Path("src/output/images") / f"chunk_{i}.png" for i in members]
+                    if writer is not None:
+                        # Submitted after the array is taken, so only the writer thread touches the image
+                        writer.submit(self._save_scene_image, image, image_paths)
+
+                    for position, i in enumerate(members):
+                        image_path = image_paths[position] if writer is not None else None
+                        meta = {
+                            "chunk_index": i,
+                            "text": sentences[i],
+                            "image": image_array,
+                            "image_path": str(image_path) if image_path is not None else None,
+                            "scene_index": scene,
+                            "scene_position": position
+                        }
+                        image_metadata.append(meta)
+                        if segment_queue is not None:
+                            segment_queue.put(("image", meta))
+            finally:
+                del pipe
+                # Release the model even if generation fails so the manager can evict it
+                self._cleanup()
+                if writer is not None:
+                    writer.close()
+
+        image_metadata.sort(key=lambda meta: meta["chunk_index"])
         return image_metadata
 
-    def _generate_image_chunk(self, text):
+    def _save_scene_image(self, image, paths):
+        """Encode a scene image once and copy the file to every other sentence of the scene"""
+        # Low compression keeps the write cheap; it runs while the next image generates
+        image.save(paths[0], compress_level=1)
+        for path in paths[1:]:
+            shutil.copyfile(paths[0], path)
+
+    def _generate_image_chunk(self, pipe, text):
         """Generate a single image from text"""
         negative_prompt = "3d render, realistic"
         enhanced_prompt = self._enhance_prompt(text)
         generator = torch.manual_seed(0)
         
-        image = self.image_generator(
+        image = pipe(
             enhanced_prompt,
             num_inference_steps=8,
             height=1920,
@@ -109,7 +208,8 @@ class ImageGenerator:
         return f"{base_prompt}, {self.style}"
 
     def _cleanup(self):
-        """Clean up GPU memory"""
-        torch.cuda.empty_cache()
-        del self.image_generator
-        torch.cuda.empty_cache()
\ No newline at end of file
+        """Release the pipeline; a shared manager keeps it warm until the room is needed"""
+        if self.owns_manager:
+            self.model_manager.drop(self.model_name)
+        else:
+            self.model_manager.release(self.model_name)
\ No newline at end of file
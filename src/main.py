@@ -2,12 +2,20 @@
 Main entry point for the video generation system
 """
 
-import torch
 import shutil
 import random
 from pathlib import Path
 from src.generators import ImageGenerator, AudioGenerator, generate_story, setup_model
-from src.utils import create_video_from_images_and_audio, ensure_output_dirs
+from src.utils import ModelManager, SegmentRenderer, ensure_output_dirs
+
+# SDXL placement: None (fully on GPU), "model" or "sequential" CPU offload for smaller cards
+SDXL_CPU_OFFLOAD = None
+# Approximate footprint of the 4-bit Mistral model, used to make room before it loads
+MISTRAL_SIZE_BYTES = 5 * 1024 ** 3
+# Image reuse: None for one image per sentence, "consecutive" or "cluster" to share
+# one image across SCENE_GROUP_SIZE sentences (reused images get pan/zoom motion)
+SCENE_GROUPING = None
+SCENE_GROUP_SIZE = 2
 
 def main():
     """Main function to run the video generation process"""
@@ -19,32 +27,37 @@ def main():
     audio_output_dir = Path("src/output/audio")
     if audio_output_dir.exists():
         shutil.rmtree(audio_output_dir)
+
+    segment_output_dir = Path("src/output/segments")
+    if segment_output_dir.exists():
+        shutil.rmtree(segment_output_dir)
         
     ensure_output_dirs() # create a new directory
 
-    model, tokenizer = setup_model()
-    # Get user input
-    while True:
-        topic = input("Enter your topic: ")
-        print("---------------------------------------------\n")
-        script = generate_story(topic, model, tokenizer)
-        print(script)
-        print()
+    model_manager = ModelManager()
+    # 4-bit weights cannot be moved to CPU, so the model is dropped rather than offloaded
+    model_manager.register(
+        "mistral", setup_model, size_bytes=MISTRAL_SIZE_BYTES, offloadable=False,
+        move_fn=lambda loaded, device: loaded  # loaded onto the GPU by setup_model
+    )
 
-        if input("Do you want to use this script? (y/n): ").lower() == "y":
-            title = input("Enter your title: ")
-            style = input("Enter your style (pixel / papercut): ")
-            break
+    # Get user input
+    with model_manager.stage("script"):
+        model, tokenizer = model_manager.acquire("mistral")
+        while True:
+            topic = input("Enter your topic: ")
+            print("---------------------------------------------\n")
+            script = generate_story(topic, model, tokenizer)
+            print(script)
+            print()
 
-    # Generate content
-    torch.cuda.empty_cache()
-    torch.cuda.synchronize()
-
-    image_generator = ImageGenerator(style)
-    image_metadata = image_generator.generate_images(script)
-    
-    audio_generator = AudioGenerator()
-    audio_metadata = audio_generator.generate_audio(script)
+            if input("Do you want to use this script? (y/n): ").lower() == "y":
+                title = input("Enter your title: ")
+                style = input("Enter your style (pixel / papercut): ")
+                break
+        del model, tokenizer
+        # The script is final and the model is not used again, so free it before SDXL loads
+        model_manager.drop("mistral")
 
     # Select background music
     bgm_config = {
@@ -56,20 +69,35 @@ def main():
     selected_bgm = random.choice(list(bgm_config.keys()))
     bgm_reduce = bgm_config[selected_bgm]
 
-    # Create final video
-    create_video_from_images_and_audio(
-        image_dir="src/output/images",
-        audio_dir="src/output/audio",
+    # Segments are encoded in the background as soon as their image and audio exist
+    renderer = SegmentRenderer(
         output_video_path=f"src/output/video/AI on {title}.mp4",
-        script=script,
         bgm_path=f"src/assets/bgm/{selected_bgm}",
-        input=title,
+        title=title,
         bgm_reduce=bgm_reduce,
-        transition_duration_ms=200
-    )
+        transition_duration_ms=200,
+        ken_burns=SCENE_GROUPING is not None
+    ).start()
+
+    try:
+        # Generate content; audio runs first since it is quick, so each image completes a segment
+        audio_generator = AudioGenerator(model_manager=model_manager)
+        audio_generator.generate_audio(script, segment_queue=renderer)
+
+        image_generator = ImageGenerator(style, model_manager=model_manager, cpu_offload=SDXL_CPU_OFFLOAD)
+        image_generator.generate_images(
+            script, scene_grouping=SCENE_GROUPING, group_size=SCENE_GROUP_SIZE, segment_queue=renderer
+        )
+    except BaseException:
+        # Stop the render worker and remove its clips; also reached when a segment failed to render
+        renderer.abort()
+        raise
+
+    # Create final video from the already encoded segments
+    renderer.finish()
 
-    torch.cuda.empty_cache()
-    torch.cuda.synchronize()
+    model_manager.drop_all()
+    model_manager.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,8 @@
+from .async_writer import AsyncWriter
+from .model_manager import ModelManager
 from .ensure_output_dir import ensure_output_dirs
 from .text_normalizer import TextNormalizer
 from .video_creator import create_video_from_images_and_audio
+from .segment_renderer import SegmentRenderer
 
-__all__ = ['TextNormalizer', 'create_video_from_images_and_audio', 'ensure_output_dirs']
+__all__ = ['AsyncWriter', 'ModelManager', 'SegmentRenderer', 'TextNormalizer', 'create_video_from_images_and_audio', 'ensure_output_dirs']
@@ -0,0 +1,31 @@
+"""
+Async Writer Module
+Persists generated assets to disk in the background
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncWriter:
+    def __init__(self, max_workers=2):
+        """
+        Initialize a background writer
+        Args:
+            max_workers (int): Number of threads used for writing files
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = []
+
+    def submit(self, write_fn, *args, **kwargs):
+        """Queue a write call so it runs off the generation thread"""
+        self.futures.append(self.executor.submit(write_fn, *args, **kwargs))
+
+    def wait(self):
+        """Block until every queued write has finished, re-raising any error"""
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """Finish pending writes and shut down the worker threads"""
+        self.wait()
+        self.executor.shutdown()
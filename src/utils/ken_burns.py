@@ -0,0 +1,52 @@
+"""
+Ken Burns Module
+Pan/zoom motion for still images, computed as per-frame affine transforms
+"""
+
+import numpy as np
+
+# Each motion is (start_scale, end_scale, start_center, end_center), with
+# centers given as fractions of the frame width/height
+MOTIONS = [
+    (1.0, 1.2, (0.5, 0.5), (0.5, 0.5)),     # zoom in
+    (1.2, 1.0, (0.5, 0.5), (0.5, 0.5)),     # zoom out
+    (1.2, 1.2, (0.4, 0.5), (0.6, 0.5)),     # pan left to right
+    (1.2, 1.2, (0.6, 0.5), (0.4, 0.5)),     # pan right to left
+    (1.2, 1.2, (0.5, 0.4), (0.5, 0.6)),     # pan top to bottom
+    (1.2, 1.2, (0.5, 0.6), (0.5, 0.4)),     # pan bottom to top
+    (1.05, 1.25, (0.5, 0.55), (0.45, 0.4)), # zoom in towards upper left
+    (1.25, 1.05, (0.55, 0.4), (0.5, 0.55)), # zoom out from upper right
+]
+
+def motion_schedule(num_frames, frame_width, frame_height, motion_index=0):
+    """
+    Precompute the affine transform of every frame of a pan/zoom motion
+    Args:
+        num_frames (int): Number of frames in the segment
+        frame_width (int): Output frame width
+        frame_height (int): Output frame height
+        motion_index (int): Which entry of MOTIONS to use (wraps around)
+    Returns:
+        np.ndarray: float32 array of shape (num_frames, 2, 3) for cv2.warpAffine
+    """
+    start_scale, end_scale, start_center, end_center = MOTIONS[motion_index % len(MOTIONS)]
+
+    t = np.linspace(0.0, 1.0, num_frames) if num_frames > 1 else np.zeros(num_frames)
+    ease = t * t * (3 - 2 * t)  # smoothstep so the motion starts and stops gently
+
+    scale = start_scale + (end_scale - start_scale) * ease
+    cx = (start_center[0] + (end_center[0] - start_center[0]) * ease) * frame_width
+    cy = (start_center[1] + (end_center[1] - start_center[1]) * ease) * frame_height
+
+    # Keep the visible crop inside the source image
+    half_w = frame_width / (2 * scale)
+    half_h = frame_height / (2 * scale)
+    cx = np.clip(cx, half_w, frame_width - half_w)
+    cy = np.clip(cy, half_h, frame_height - half_h)
+
+    matrices = np.zeros((num_frames, 2, 3), dtype=np.float32)
+    matrices[:, 0, 0] = scale
+    matrices[:, 1, 1] = scale
+    matrices[:, 0, 2] = frame_width / 2 - scale * cx
+    matrices[:, 1, 2] = frame_height / 2 - scale * cy
+    return matrices
@@ -0,0 +1,226 @@
+"""
+Model Manager Module
+Tracks accelerator memory used by the pipeline's models and offloads or
+evicts them when the next stage needs room
+"""
+
+import gc
+import time
+from contextlib import contextmanager
+import torch
+
+def estimate_size(obj):
+    """
+    Estimate the device footprint of a model in bytes
+    Handles torch modules, diffusers pipelines and tuples/lists/dicts of them.
+    Objects that are not models (tokenizers, processors, ...) count as 0.
+    """
+    if isinstance(obj, torch.nn.Module):
+        tensors = list(obj.parameters()) + list(obj.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if isinstance(obj, torch.Tensor):
+        return obj.numel() * obj.element_size()
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_size(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(estimate_size(o) for o in obj.values())
+    if hasattr(obj, "components"):
+        return sum(estimate_size(o) for o in obj.components.values())
+    return 0
+
+def move_to(obj, device):
+    """Move a model, pipeline or tuple/list/dict of them to device, returning the moved object"""
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(move_to(o, device) for o in obj)
+    if isinstance(obj, dict):
+        return {k: move_to(v, device) for k, v in obj.items()}
+    if hasattr(obj, "to"):
+        moved = obj.to(device)
+        return obj if moved is None else moved
+    return obj
+
+class _Entry:
+    def __init__(self, name, loader, device, size_bytes, reserve_bytes, offloadable, move_fn, size_fn):
+        self.name = name
+        self.loader = loader
+        self.device = device
+        self.size_hint = size_bytes
+        self.size_bytes = size_bytes or 0
+        self.reserve_bytes = reserve_bytes
+        self.offloadable = offloadable
+        self.move_fn = move_fn
+        self.size_fn = size_fn
+        self.model = None
+        self.location = None  # None (not loaded), "cpu" or the target device
+        self.in_use = 0
+        self.last_used = 0.0
+
+class ModelManager:
+    def __init__(self, device="cuda", memory_budget=None, cpu_budget=None):
+        """
+        Initialize the model manager
+        Args:
+            device (str): Accelerator the models run on
+            memory_budget (int): Bytes the managed models may occupy on device.
+                                 Defaults to 90% of the card when CUDA is available,
+                                 otherwise unlimited.
+            cpu_budget (int): Bytes offloaded models may occupy in host memory
+                              before the least recently used ones are dropped.
+                              None means unlimited.
+        """
+        self.device = device
+        if memory_budget is None and device.startswith("cuda") and torch.cuda.is_available():
+            memory_budget = int(torch.cuda.get_device_properties(device).total_memory * 0.9)
+        self.memory_budget = memory_budget
+        self.cpu_budget = cpu_budget
+        self.entries = {}
+        self.stage_peaks = {}
+        self._tracked_peak = 0
+
+    def register(self, name, loader, device=None, size_bytes=None, reserve_bytes=0, offloadable=True, move_fn=None, size_fn=None):
+        """
+        Register a model without loading it
+        Args:
+            name (str): Key used with acquire/release
+            loader (callable): Returns the model (or tuple of models) when called
+            device (str): Device the model runs on, defaults to the manager's device
+            size_bytes (int): Footprint used to make room before the first load;
+                              replaced by the measured size once loaded
+            reserve_bytes (int): Working memory (activations, decode buffers) the
+                                 model needs on top of its weights while it runs;
+                                 kept free when making room for it
+            offloadable (bool): False for models that cannot be moved to CPU
+                                (e.g. 4-bit quantized weights); they are dropped instead
+            move_fn (callable): move_fn(model, device) -> model, defaults to move_to
+            size_fn (callable): size_fn(model) -> bytes, defaults to estimate_size
+        """
+        self.entries[name] = _Entry(
+            name, loader, device or self.device, size_bytes, reserve_bytes, offloadable,
+            move_fn or move_to, size_fn or estimate_size
+        )
+
+    def acquire(self, name):
+        """Return the model on its device, loading it and making room as needed"""
+        entry = self.entries[name]
+        entry.in_use += 1
+        entry.last_used = time.monotonic()
+
+        if entry.location == entry.device:
+            return entry.model
+
+        if self._is_accelerator(entry.device):
+            self._make_room(entry.size_bytes + entry.reserve_bytes, entry.device)
+
+        if entry.model is None:
+            print(f"Loading model: {name}")
+            entry.model = entry.loader()
+            measured = entry.size_fn(entry.model)
+            if measured:
+                entry.size_bytes = measured
+        entry.model = entry.move_fn(entry.model, entry.device)
+        entry.location = entry.device
+        self._update_tracked_peak()
+        return entry.model
+
+    def release(self, name):
+        """Mark a model as idle; it stays warm until another model needs the room"""
+        entry = self.entries[name]
+        entry.in_use = max(0, entry.in_use - 1)
+
+    def offload(self, name):
+        """Move a model to CPU, or drop it if it cannot be offloaded"""
+        entry = self.entries[name]
+        if entry.model is None or entry.location == "cpu":
+            return
+        if not entry.offloadable:
+            self.drop(name)
+            return
+        print(f"Offloading model to CPU: {name}")
+        entry.model = entry.move_fn(entry.model, "cpu")
+        entry.location = "cpu"
+        self._empty_cache()
+        self._enforce_cpu_budget()
+
+    def drop(self, name):
+        """Release every reference the manager holds to a model"""
+        entry = self.entries[name]
+        if entry.model is None:
+            return
+        print(f"Dropping model: {name}")
+        entry.model = None
+        entry.location = None
+        entry.in_use = 0
+        gc.collect()
+        self._empty_cache()
+
+    def drop_all(self):
+        """Drop every managed model"""
+        for name in list(self.entries):
+            self.drop(name)
+
+    def device_usage(self, device=None):
+        """Bytes currently accounted to models resident on device"""
+        device = device or self.device
+        return sum(e.size_bytes for e in self.entries.values() if e.location == device)
+
+    @contextmanager
+    def stage(self, name):
+        """Record the peak device memory seen while the block runs"""
+        use_cuda = self.device.startswith("cuda") and torch.cuda.is_available()
+        if use_cuda:
+            torch.cuda.reset_peak_memory_stats(self.device)
+        self._tracked_peak = self.device_usage()
+        try:
+            yield self
+        finally:
+            if use_cuda:
+                peak = torch.cuda.max_memory_allocated(self.device)
+            else:
+                peak = self._tracked_peak
+            self.stage_peaks[name] = max(peak, self.stage_peaks.get(name, 0))
+
+    def report(self):
+        """Print and return the peak device memory per stage"""
+        print("\nPeak device memory per stage:")
+        for name, peak in self.stage_peaks.items():
+            print(f"  {name}: {peak / 1024 ** 3:.2f} GiB")
+        return dict(self.stage_peaks)
+
+    def _make_room(self, needed, device):
+        """Offload least recently used idle models until needed bytes fit the budget"""
+        if self.memory_budget is None:
+            return
+        candidates = sorted(
+            (e for e in self.entries.values() if e.location == device and e.in_use == 0),
+            key=lambda e: e.last_used
+        )
+        for entry in candidates:
+            if self.device_usage(device) + needed <= self.memory_budget:
+                return
+            self.offload(entry.name)
+        if self.device_usage(device) + needed > self.memory_budget:
+            print(f"Warning: {needed / 1024 ** 3:.2f} GiB needed but only "
+                  f"{(self.memory_budget - self.device_usage(device)) / 1024 ** 3:.2f} GiB free in budget")
+
+    def _enforce_cpu_budget(self):
+        """Drop least recently used offloaded models while host memory is over budget"""
+        if self.cpu_budget is None:
+            return
+        offloaded = sorted(
+            (e for e in self.entries.values() if e.location == "cpu" and e.device != "cpu"),
+            key=lambda e: e.last_used
+        )
+        for entry in offloaded:
+            if sum(e.size_bytes for e in offloaded if e.location == "cpu") <= self.cpu_budget:
+                return
+            self.drop(entry.name)
+
+    def _update_tracked_peak(self):
+        self._tracked_peak = max(self._tracked_peak, self.device_usage())
+
+    def _is_accelerator(self, device):
+        return device is not None and device != "cpu"
+
+    def _empty_cache(self):
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
@@ -0,0 +1,89 @@
+"""
+Scene Grouping Module
+Assigns sentences to scenes so several sentences can share one generated image
+"""
+
+import math
+import re
+
+# Every generated fact starts with this opener; it carries nothing for the image
+FACT_OPENER = re.compile(r"^\s*did you know( that)?\s*", re.IGNORECASE)
+
+def group_consecutive(sentences, group_size):
+    """
+    Put every group_size consecutive sentences into the same scene
+    Returns:
+        list: Scene index for each sentence
+    """
+    return [i // group_size for i in range(len(sentences))]
+
+def group_by_similarity(sentences, group_size):
+    """
+    Cluster sentences by meaning, aiming for group_size sentences per scene
+    Scene indices are numbered in order of first appearance.
+    Returns:
+        list: Scene index for each sentence
+    """
+    num_scenes = math.ceil(len(sentences) / group_size)
+    if num_scenes <= 1 or len(sentences) < 2:
+        return [0] * len(sentences)
+
+    from sentence_transformers import SentenceTransformer
+    from sklearn.cluster import AgglomerativeClustering
+
+    encoder = SentenceTransformer("all-MiniLM-L6-v2", device="cpu")
+    embeddings = encoder.encode(sentences, normalize_embeddings=True)
+    labels = AgglomerativeClustering(n_clusters=num_scenes).fit_predict(embeddings)
+
+    order = {}
+    for label in labels:
+        order.setdefault(label, len(order))
+    return [order[label] for label in labels]
+
+def scene_prompt(sentences, max_length=200):
+    """
+    Build one image prompt covering every sentence of a scene
+    Joining the full sentences would let the prompt cut-off drop everything
+    after the first one, so each sentence gets an equal share of max_length:
+    the "Did you know that" opener and final period are removed, then each
+    sentence is cut at a word boundary to its share.
+    A single sentence is returned unchanged.
+    Returns:
+        str: Prompt of at most max_length characters
+    """
+    if len(sentences) == 1:
+        return sentences[0]
+
+    # Sentences that are nothing but the opener add no content and get no share
+    texts = [FACT_OPENER.sub("", sentence).strip().rstrip(".").strip() for sentence in sentences]
+    texts = [text for text in texts if text]
+    if not texts:
+        return ""
+
+    separator = "; "
+    budget = (max_length - len(separator) * (len(texts) - 1)) // len(texts)
+    parts = []
+    for text in texts:
+        if len(text) > budget:
+            text = text[:budget].rsplit(" ", 1)[0] if " " in text[:budget] else text[:budget]
+        parts.append(text)
+    return separator.join(parts)
+
+def group_sentences(sentences, scene_grouping=None, group_size=2):
+    """
+    Assign each sentence a scene index
+    Args:
+        sentences (list): Sentences of the script
+        scene_grouping (str): None for one scene per sentence, "consecutive"
+                              or "cluster"
+        group_size (int): Target number of sentences per scene
+    Returns:
+        list: Scene index for each sentence
+    """
+    if scene_grouping is None or group_size <= 1:
+        return list(range(len(sentences)))
+    if scene_grouping == "consecutive":
+        return group_consecutive(sentences, group_size)
+    if scene_grouping == "cluster":
+        return group_by_similarity(sentences, group_size)
+    raise ValueError(f"Unknown scene grouping: {scene_grouping}")
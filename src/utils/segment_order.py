@@ -0,0 +1,50 @@
+"""
+Segment Order Module
+Decides when each video segment has everything it needs to be rendered
+"""
+
+class SegmentOrder:
+    def __init__(self, render_fn):
+        """
+        Initialize the segment ordering
+        Args:
+            render_fn (callable): render_fn(index, image_meta, audio_meta, next_image_meta)
+                                  renders one segment; next_image_meta is None
+                                  for the last segment, which has no transition
+        """
+        self.render_fn = render_fn
+        self.image_metadata = {}
+        self.audio_metadata = {}
+        self.next_index = 0
+
+    def add(self, kind, meta):
+        """Store a published ("image" or "audio") asset; assets may arrive in any order"""
+        if kind == "image":
+            self.image_metadata[meta["chunk_index"]] = meta
+        elif kind == "audio":
+            self.audio_metadata[meta["chunk_index"]] = meta
+        else:
+            raise ValueError(f"Unknown segment asset: {kind}")
+
+    def render_ready(self, final=False):
+        """
+        Render segments in order while their image, audio and next image are available
+        Segment i waits for image i+1 so it can end with its transition; once
+        generation is final, the last segment is rendered without one.
+        Returns:
+            list: Indices rendered by this call
+        """
+        rendered = []
+        while True:
+            i = self.next_index
+            if i not in self.image_metadata or i not in self.audio_metadata:
+                return rendered
+            next_meta = self.image_metadata.get(i + 1)
+            if next_meta is None and not final:
+                return rendered
+            self.render_fn(i, self.image_metadata[i], self.audio_metadata[i], next_meta)
+            # The next segment still needs its own image; only this one's assets can go
+            del self.image_metadata[i]
+            del self.audio_metadata[i]
+            self.next_index += 1
+            rendered.append(i)
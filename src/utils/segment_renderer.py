@@ -0,0 +1,164 @@
+"""
+Segment Renderer Module
+Encodes video segments in the background as soon as their assets are ready
+"""
+
+import queue
+import threading
+from pathlib import Path
+import cv2
+from pydub import AudioSegment
+from src.utils.ken_burns import motion_schedule
+from src.utils.segment_order import SegmentOrder
+from src.utils.video_creator import (
+    FRAME_HEIGHT, FRAME_RATE, FRAME_WIDTH, add_background_music, load_audio_chunks,
+    load_images, motion_index, mux_video_and_audio, pad_image_to_fit, segment_frame_count,
+    write_segment
+)
+
+class SegmentRenderer:
+    def __init__(self, output_video_path, bgm_path, title, bgm_reduce, transition_duration_ms=500, ken_burns=False, clip_dir="src/output/segments"):
+        """
+        Initialize the segment renderer
+        Generators publish ("image", metadata) and ("audio", metadata) items
+        with put(). Segment i is encoded to its own clip once image i and audio i
+        exist and image i+1 has arrived for the transition; finish() encodes the
+        last segment and concatenates the clips with the mixed audio.
+        Args:
+            output_video_path (str): Final video path
+            bgm_path (str): Background music file
+            title (str): Video title shown at the top
+            bgm_reduce (int): dB to lower the background music by
+            transition_duration_ms (int): Crossfade length between segments
+            ken_burns (bool): Pan/zoom over each image instead of static frames
+            clip_dir (str): Directory for the intermediate segment clips
+        """
+        self.output_video_path = output_video_path
+        self.bgm_path = bgm_path
+        self.title = title
+        self.bgm_reduce = bgm_reduce
+        self.transition_duration_ms = transition_duration_ms
+        self.transition_frames = int((transition_duration_ms / 1000) * FRAME_RATE)
+        self.ken_burns = ken_burns
+        self.clip_dir = Path(clip_dir)
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.error = None
+        self.aborted = False
+
+        self.order = SegmentOrder(self._render_segment)
+        self.clip_paths = []
+        self.segment_audio = []
+
+    def start(self):
+        """Start the render worker"""
+        self.clip_dir.mkdir(parents=True, exist_ok=True)
+        self.thread.start()
+        return self
+
+    def put(self, item):
+        """
+        Publish a generated asset to the render worker
+        Raises the worker's error as soon as a segment has failed to render,
+        so generation stops instead of feeding a queue nothing drains.
+        """
+        if self.error is not None:
+            raise self.error
+        self.queue.put(item)
+
+    def abort(self):
+        """Stop the render worker after a generation failure and delete the clips written so far"""
+        self.aborted = True
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self._remove_intermediates([self.clip_dir / "segments.txt"])
+
+    def finish(self):
+        """
+        Signal that generation is done, wait for the remaining segments and
+        produce the final video with a concat/mux pass
+        Raises an exception if the mux fails; on success the intermediate
+        clips and temporary files are deleted.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        if not self.clip_paths:
+            raise Exception("No segments were rendered")
+
+        final_audio = sum(self.segment_audio[1:], self.segment_audio[0])
+        final_audio = add_background_music(final_audio, self.bgm_path, self.bgm_reduce)
+
+        concat_list_path = self.clip_dir / "segments.txt"
+        concat_list_path.write_text("".join(f"file '{path.resolve()}'\n" for path in self.clip_paths))
+
+        # The clips are already MPEG-4, so the video stream is copied rather than re-encoded
+        mux_video_and_audio(
+            ["-f", "concat", "-safe", "0", "-i", str(concat_list_path)],
+            final_audio, self.output_video_path, video_codec="copy",
+            temp_paths=[*self.clip_paths, concat_list_path]
+        )
+        self._remove_intermediates([])
+
+    def _remove_intermediates(self, extra_paths):
+        """Delete the segment clips and the temporary concat/mux inputs"""
+        for path in self.clip_paths + [Path(p) for p in extra_paths]:
+            path.unlink(missing_ok=True)
+        self.clip_paths = []
+        if self.clip_dir.exists() and not any(self.clip_dir.iterdir()):
+            self.clip_dir.rmdir()
+
+    def _run(self):
+        """Consume published assets and render every segment that became ready"""
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None or self.aborted:
+                    break
+                kind, meta = item
+                self.order.add(kind, meta)
+                self.order.render_ready(final=False)
+            if not self.aborted:
+                self.order.render_ready(final=True)
+        except Exception as e:
+            self.error = e
+
+    def _render_segment(self, i, meta, audio_meta, next_meta):
+        """Encode segment i, with its transition when there is a next image, to a clip"""
+        has_next = next_meta is not None
+        img = pad_image_to_fit(load_images(image_metadata=[meta])[0], FRAME_WIDTH, FRAME_HEIGHT)
+        audio_chunk = load_audio_chunks(audio_metadata=[audio_meta])[0]
+        num_frames = segment_frame_count(audio_chunk)
+
+        next_img = None
+        motion = None
+        next_matrix = None
+        if has_next:
+            next_img = pad_image_to_fit(load_images(image_metadata=[next_meta])[0], FRAME_WIDTH, FRAME_HEIGHT)
+        if self.ken_burns:
+            motion = motion_schedule(max(1, num_frames), FRAME_WIDTH, FRAME_HEIGHT, motion_index(meta, i))
+            if has_next:
+                # The first transform of a schedule does not depend on its length
+                next_matrix = motion_schedule(1, FRAME_WIDTH, FRAME_HEIGHT, motion_index(next_meta, i + 1))[0]
+
+        clip_path = self.clip_dir / f"segment_{i}.avi"
+        fourcc = cv2.VideoWriter_fourcc(*'XVID')
+        out = cv2.VideoWriter(str(clip_path), fourcc, FRAME_RATE, (FRAME_WIDTH, FRAME_HEIGHT))
+        if not out.isOpened():
+            raise Exception(f"Could not open video writer for {clip_path}")
+
+        write_segment(
+            out, img, meta["text"], self.title, num_frames,
+            next_img=next_img, transition_frames=self.transition_frames,
+            motion=motion, next_matrix=next_matrix
+        )
+        out.release()
+
+        if has_next:
+            audio_chunk = audio_chunk + AudioSegment.silent(duration=self.transition_duration_ms)
+        self.clip_paths.append(clip_path)
+        self.segment_audio.append(audio_chunk)
+        print(f"Rendered segment {i+1}")
@@ -4,10 +4,17 @@ Handles video creation and editing
 """
 
 import cv2
+import numpy as np
 import subprocess
 from pathlib import Path
 from pydub import AudioSegment
 import os
+from src.utils.ken_burns import motion_schedule
+
+# Video parameters
+FRAME_WIDTH = 1080
+FRAME_HEIGHT = 1920
+FRAME_RATE = 30
 
 def wrap_text(words, font, max_width):
     """Wrap words to fit within the width of the video frame."""
@@ -43,144 +50,199 @@ def pad_image_to_fit(img, target_width, target_height):
     padded_img = cv2.copyMakeBorder(img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
     return padded_img
 
-def create_video_from_images_and_audio(image_dir, audio_dir, output_video_path, script, bgm_path, input, bgm_reduce, transition_duration_ms=500):
-    # Split the script into sentences
-    sentences = script.split('.')
-    sentences = [sentence.strip() for sentence in sentences if sentence.strip()]
-
-    # Get the list of images and sort them
-    images = sorted([os.path.join(image_dir, img) for img in os.listdir(image_dir) if img.endswith(".png")])
-
-    # Get the list of audio chunks and sort them
-    audio_chunks = sorted([os.path.join(audio_dir, audio) for audio in os.listdir(audio_dir) if audio.endswith(".wav")])
-
-    # Video parameters
-    frame_width = 1080
-    frame_height = 1920
-    frame_rate = 30
-
-    # Create temporary video file using XVID codec
-    temp_video_path = "temp_video_output.avi"
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    out = cv2.VideoWriter(temp_video_path, fourcc, frame_rate, (frame_width, frame_height))
-
-    if not out.isOpened():
-        raise Exception("Could not open video writer")
-
-    # Font settings for subtitles
+def waveform_to_segment(waveform, sample_rate):
+    """Convert a float waveform in [-1, 1] to a 16-bit mono AudioSegment."""
+    pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype(np.int16)
+    return AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=sample_rate, channels=1)
+
+def load_images(image_dir=None, image_metadata=None):
+    """Return BGR image arrays, taken from metadata when available, otherwise read from image_dir."""
+    if image_metadata is not None:
+        images = []
+        for meta in sorted(image_metadata, key=lambda m: m["chunk_index"]):
+            img = meta.get("image")
+            if img is None:
+                img = cv2.imread(meta["image_path"])
+                if img is None:
+                    raise Exception(f"Could not read image: {meta['image_path']}")
+            images.append(img)
+        return images
+
+    images = []
+    for path in sorted([os.path.join(image_dir, img) for img in os.listdir(image_dir) if img.endswith(".png")]):
+        img = cv2.imread(path)
+        if img is None:
+            raise Exception(f"Could not read image: {path}")
+        images.append(img)
+    return images
+
+def load_audio_chunks(audio_dir=None, audio_metadata=None):
+    """Return AudioSegments, built from metadata waveforms when available, otherwise read from audio_dir."""
+    if audio_metadata is not None:
+        audio_chunks = []
+        for meta in sorted(audio_metadata, key=lambda m: m["chunk_index"]):
+            if meta.get("audio") is not None:
+                audio_chunks.append(waveform_to_segment(meta["audio"], meta.get("sample_rate", 16000)))
+            else:
+                audio_chunks.append(AudioSegment.from_wav(meta["audio_path"]))
+        return audio_chunks
+
+    paths = sorted([os.path.join(audio_dir, audio) for audio in os.listdir(audio_dir) if audio.endswith(".wav")])
+    return [AudioSegment.from_wav(path) for path in paths]
+
+def draw_title(img, title, frame_width):
+    """Draw the two-line title box near the top of the frame."""
     font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 2
-    font_thickness = 5
-    text_color = (255, 255, 255)  # White for subtitles
-    border_color = (0, 0, 0)  # Black border for subtitles
-
-    # Font settings for title
     title_text_color = (0, 0, 0)  # Black text for the title
     title_bg_color = (255, 255, 255)  # White background for the title
     title_font_scale = 2
     title_font_thickness = 5
 
-    # Initialize final audio track with first chunk
-    final_audio = AudioSegment.from_wav(audio_chunks[0])
-    current_position_ms = len(final_audio)
-
-    # Process each image and its corresponding sentence
-    for i in range(len(images)):
-        # Load and process current image
-        img = cv2.imread(images[i])
-        if img is None:
-            raise Exception(f"Could not read image: {images[i]}")
-
-        # Pad the image to fit the video size
-        img = pad_image_to_fit(img, frame_width, frame_height)
-
-        # Load current audio chunk
-        if i > 0:
-            current_audio = AudioSegment.from_wav(audio_chunks[i])
-            final_audio = final_audio + current_audio
-            current_position_ms += len(current_audio)
+    title_text = f"POV: AI on\n {title}"
+    title_lines = title_text.split("\n")
 
-        # Add title to the image
-        title_text = f"POV: AI on\n {input}"
-        title_lines = title_text.split("\n")
+    # Calculate the size for both lines
+    title_size_1 = cv2.getTextSize(title_lines[0], font, title_font_scale, title_font_thickness)[0]
+    title_size_2 = cv2.getTextSize(title_lines[1], font, title_font_scale, title_font_thickness)[0]
 
-        # Calculate the size for both lines
-        title_size_1 = cv2.getTextSize(title_lines[0], font, title_font_scale, title_font_thickness)[0]
-        title_size_2 = cv2.getTextSize(title_lines[1], font, title_font_scale, title_font_thickness)[0]
+    # Calculate the x position for centering the title for both lines
+    title_x_1 = (frame_width - title_size_1[0]) // 2
+    title_x_2 = (frame_width - title_size_2[0]) // 2
 
-        # Calculate the x position for centering the title for both lines
-        title_x_1 = (frame_width - title_size_1[0]) // 2
-        title_x_2 = (frame_width - title_size_2[0]) // 2
+    # Set y position for the two lines
+    title_y_1 = 100  # Position the first line near the top
+    title_y_2 = title_y_1 + title_size_1[1] + 10  # Position the second line below the first one
 
-        # Set y position for the two lines
-        title_y_1 = 100  # Position the first line near the top
-        title_y_2 = title_y_1 + title_size_1[1] + 10  # Position the second line below the first one
+    # Draw background rectangle for the title
+    rect_x1 = min(title_x_1, title_x_2) - 10
+    rect_y1 = title_y_1 - title_size_1[1] - 10
+    rect_x2 = max(title_x_1 + title_size_1[0], title_x_2 + title_size_2[0]) + 10
+    rect_y2 = title_y_2 + 10
+    cv2.rectangle(img, (rect_x1, rect_y1), (rect_x2, rect_y2), title_bg_color, -1)
 
-        # Draw background rectangle for the title
-        rect_x1 = min(title_x_1, title_x_2) - 10
-        rect_y1 = title_y_1 - title_size_1[1] - 10
-        rect_x2 = max(title_x_1 + title_size_1[0], title_x_2 + title_size_2[0]) + 10
-        rect_y2 = title_y_2 + 10
-        cv2.rectangle(img, (rect_x1, rect_y1), (rect_x2, rect_y2), title_bg_color, -1)
+    # Add title text
+    cv2.putText(img, title_lines[0], (title_x_1, title_y_1), font, title_font_scale, title_text_color, title_font_thickness, cv2.LINE_AA)
+    cv2.putText(img, title_lines[1], (title_x_2, title_y_2), font, title_font_scale, title_text_color, title_font_thickness, cv2.LINE_AA)
 
-        # Add title text
-        cv2.putText(img, title_lines[0], (title_x_1, title_y_1), font, title_font_scale, title_text_color, title_font_thickness, cv2.LINE_AA)
-        cv2.putText(img, title_lines[1], (title_x_2, title_y_2), font, title_font_scale, title_text_color, title_font_thickness, cv2.LINE_AA)
-
-
-        # Get current sentence
-        if i < len(sentences):
-            current_sentence = sentences[i] + '.'  # Add period back
-            words = current_sentence.split()
-
-            # Calculate frames for current audio segment
-            current_audio_duration = len(final_audio) if i == 0 else len(AudioSegment.from_wav(audio_chunks[i]))
-            total_frames = int(current_audio_duration / 1000 * frame_rate)
-
-            # Create frames with full sentence
-            for frame_num in range(total_frames):
-                current_frame = img.copy()
-
-                # Wrap the sentence
-                wrapped_lines = wrap_text(words, font, frame_width - 100)
-                subtitle_height = len(wrapped_lines) * 60
-                y_position = (frame_height - subtitle_height) // 2
-
-                # Display each line
-                for line_idx, line in enumerate(wrapped_lines):
-                    line_text = ' '.join(line)
-                    text_size = cv2.getTextSize(line_text, font, font_scale, font_thickness)[0]
-                    text_x = (frame_width - text_size[0]) // 2
-                    text_y = y_position + (line_idx * 60)
-
-                    # Add text border and main text
-                    cv2.putText(current_frame, line_text, (text_x - 2, text_y - 2), font, font_scale, 
-                              border_color, font_thickness + 2, cv2.LINE_AA)
-                    cv2.putText(current_frame, line_text, (text_x, text_y), font, font_scale, 
-                              text_color, font_thickness, cv2.LINE_AA)
+def draw_subtitle(img, sentence, frame_width, frame_height):
+    """Draw the wrapped, outlined sentence in the middle of the frame."""
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 2
+    font_thickness = 5
+    text_color = (255, 255, 255)  # White for subtitles
+    border_color = (0, 0, 0)  # Black border for subtitles
 
+    # Wrap the sentence
+    wrapped_lines = wrap_text(sentence.split(), font, frame_width - 100)
+    subtitle_height = len(wrapped_lines) * 60
+    y_position = (frame_height - subtitle_height) // 2
+
+    # Display each line
+    for line_idx, line in enumerate(wrapped_lines):
+        line_text = ' '.join(line)
+        text_size = cv2.getTextSize(line_text, font, font_scale, font_thickness)[0]
+        text_x = (frame_width - text_size[0]) // 2
+        text_y = y_position + (line_idx * 60)
+
+        # Add text border and main text
+        cv2.putText(img, line_text, (text_x - 2, text_y - 2), font, font_scale, 
+                  border_color, font_thickness + 2, cv2.LINE_AA)
+        cv2.putText(img, line_text, (text_x, text_y), font, font_scale, 
+                  text_color, font_thickness, cv2.LINE_AA)
+
+def build_overlay(draw_fn, shape):
+    """
+    Render text once so it can be stamped onto moving frames.
+    draw_fn is applied to a black and a white canvas; pixels that come out
+    identical on both were painted opaquely and form the mask.
+    """
+    black = np.zeros(shape, dtype=np.uint8)
+    white = np.full(shape, 255, dtype=np.uint8)
+    draw_fn(black)
+    draw_fn(white)
+    mask = np.all(black == white, axis=2).astype(np.uint8)
+    return black, mask
+
+def apply_motion(img, matrix):
+    """Warp an image with one frame's affine transform from motion_schedule."""
+    height, width = img.shape[:2]
+    return cv2.warpAffine(img, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+
+def motion_index(meta, index):
+    """
+    Pick a pan/zoom motion for a segment from its position in the video.
+    Consecutive segments always get different motions, so neither a shared
+    scene image nor a crossfade between scenes repeats the same move while
+    a scene spans at most len(MOTIONS) consecutive sentences.
+    """
+    if meta is None:
+        return index
+    return meta.get("chunk_index", index)
+
+def segment_frame_count(audio_chunk):
+    """Number of video frames covering an audio chunk."""
+    return int(len(audio_chunk) / 1000 * FRAME_RATE)
+
+def write_segment(out, img, sentence, title, num_frames, next_img=None, transition_frames=0, motion=None, next_matrix=None):
+    """
+    Write one segment's frames, plus its crossfade into the next image
+    Args:
+        out (cv2.VideoWriter): Destination writer
+        img (np.ndarray): Padded BGR image of this segment
+        sentence (str): Subtitle, or None to write no segment frames
+        title (str): Video title shown at the top
+        num_frames (int): Frames held on this segment
+        next_img (np.ndarray): Padded image of the next segment, None for the last one
+        transition_frames (int): Length of the crossfade into next_img
+        motion (np.ndarray): Ken Burns transform schedule from motion_schedule,
+                             None for a static frame
+        next_matrix (np.ndarray): First transform of the next segment's schedule
+    """
+    frame_height, frame_width = img.shape[:2]
+
+    # Static frames carry the title directly; moving frames get it stamped per frame
+    if motion is None:
+        img = img.copy()
+        draw_title(img, title, frame_width)
+
+    if sentence is not None:
+        if motion is not None:
+            def draw_text(canvas):
+                draw_title(canvas, title, frame_width)
+                draw_subtitle(canvas, sentence, frame_width, frame_height)
+            overlay, mask = build_overlay(draw_text, img.shape)
+
+            for matrix in motion[:num_frames]:
+                current_frame = apply_motion(img, matrix)
+                cv2.copyTo(overlay, mask, current_frame)
+                out.write(current_frame)
+        else:
+            # The frame does not change for the whole segment, so render it once
+            current_frame = img.copy()
+            draw_subtitle(current_frame, sentence, frame_width, frame_height)
+            for frame_num in range(num_frames):
                 out.write(current_frame)
 
-        # Add transition if not the last image
-        if i < len(images) - 1:
-            next_img = cv2.imread(images[i + 1])
-            if next_img is None:
-                raise Exception(f"Could not read next image: {images[i + 1]}")
-            next_img_padded = pad_image_to_fit(next_img, frame_width, frame_height)
-
-            transition_frames = int((transition_duration_ms / 1000) * frame_rate)
-            for t in range(transition_frames):
-                alpha = t / transition_frames
-                blended_frame = cv2.addWeighted(img, 1 - alpha, next_img_padded, alpha, 0)
-                out.write(blended_frame)
-
-            silence = AudioSegment.silent(duration=transition_duration_ms)
-            final_audio = final_audio + silence
-            current_position_ms += transition_duration_ms
-
-    # Close video writer
-    out.release()
-
+    if next_img is None:
+        return
+
+    if motion is not None:
+        # Blend from where this segment's motion ends to where the next one starts
+        title_overlay, title_mask = build_overlay(lambda canvas: draw_title(canvas, title, frame_width), img.shape)
+        transition_from = apply_motion(img, motion[-1])
+        cv2.copyTo(title_overlay, title_mask, transition_from)
+        transition_to = apply_motion(next_img, next_matrix)
+    else:
+        transition_from = img
+        transition_to = next_img
+
+    for t in range(transition_frames):
+        alpha = t / transition_frames
+        blended_frame = cv2.addWeighted(transition_from, 1 - alpha, transition_to, alpha, 0)
+        out.write(blended_frame)
+
+def add_background_music(final_audio, bgm_path, bgm_reduce):
+    """Loop, trim and lower the background music, then overlay it on the narration."""
     # Load background music
     bgm = AudioSegment.from_file(bgm_path)
 
@@ -199,18 +261,29 @@ def create_video_from_images_and_audio(image_dir, audio_dir, output_video_path,
     bgm = bgm - bgm_reduce  # Reduce volume by 20 dB
 
     # Overlay BGM with narration
-    final_audio = final_audio.overlay(bgm)
-
+    return final_audio.overlay(bgm)
+
+def mux_video_and_audio(video_input_args, final_audio, output_video_path, video_codec="mpeg4", temp_paths=()):
+    """
+    Export the final audio and combine it with the video using ffmpeg
+    Args:
+        video_input_args (list): ffmpeg arguments that open the video input
+        final_audio (AudioSegment): Narration mixed with background music
+        output_video_path (str): Final video path
+        video_codec (str): ffmpeg video codec, "copy" to keep the stream as is
+        temp_paths (list): Intermediate files deleted after a successful mux
+    Raises an exception if ffmpeg fails; the temporary files are then kept so
+    the failure can be inspected.
+    """
     # Export final audio to temporary file
     temp_audio_path = "temp_audio_output.wav"
     final_audio.export(temp_audio_path, format="wav")
 
-    # Combine video and audio with simplified ffmpeg command
     command = [
         "ffmpeg", "-y",
-        "-i", temp_video_path,
+        *video_input_args,
         "-i", temp_audio_path,
-        "-c:v", "mpeg4",
+        "-c:v", video_codec,
         "-c:a", "aac",
         "-strict", "experimental",
         "-shortest",
@@ -218,7 +291,82 @@ def create_video_from_images_and_audio(image_dir, audio_dir, output_video_path,
     ]
 
     try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        print(f"Video successfully created at {output_video_path}")
+        subprocess.run(command, check=True, capture_output=True, text=True)
     except subprocess.CalledProcessError as e:
-        print(f"Error during video creation: {e.stderr}")
\ No newline at end of file
+        raise Exception(f"Error during video creation: {e.stderr}") from e
+    print(f"Video successfully created at {output_video_path}")
+
+    for path in [temp_audio_path, *temp_paths]:
+        Path(path).unlink(missing_ok=True)
+
+def create_video_from_images_and_audio(image_dir, audio_dir, output_video_path, script, bgm_path, input, bgm_reduce, transition_duration_ms=500, image_metadata=None, audio_metadata=None, ken_burns=False):
+    """
+    Assemble the final video.
+    Images and audio come from the generators' metadata lists (in-memory arrays)
+    when given, otherwise they are read back from image_dir and audio_dir.
+    With ken_burns=True each segment pans/zooms over its image instead of
+    holding a static frame; segments that reuse a scene image get distinct motions.
+    """
+    # Split the script into sentences
+    sentences = script.split('.')
+    sentences = [sentence.strip() for sentence in sentences if sentence.strip()]
+
+    # Decode every image and audio chunk exactly once
+    images = load_images(image_dir, image_metadata)
+    audio_chunks = load_audio_chunks(audio_dir, audio_metadata)
+
+    # Create temporary video file using XVID codec
+    temp_video_path = "temp_video_output.avi"
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    out = cv2.VideoWriter(temp_video_path, fourcc, FRAME_RATE, (FRAME_WIDTH, FRAME_HEIGHT))
+
+    if not out.isOpened():
+        raise Exception("Could not open video writer")
+
+    transition_frames = int((transition_duration_ms / 1000) * FRAME_RATE)
+    schedules = [None] * len(images)
+    if ken_burns:
+        # Precompute every segment's transform schedule; at least one frame so transitions have an endpoint
+        ordered_meta = sorted(image_metadata, key=lambda m: m["chunk_index"]) if image_metadata is not None else [None] * len(images)
+        schedules = [
+            motion_schedule(max(1, segment_frame_count(audio_chunks[i])), FRAME_WIDTH, FRAME_HEIGHT, motion_index(meta, i))
+            for i, meta in enumerate(ordered_meta)
+        ]
+
+    # Initialize final audio track with first chunk
+    final_audio = audio_chunks[0]
+    next_img_padded = None
+
+    # Process each image and its corresponding sentence
+    for i in range(len(images)):
+        # Pad the image to fit the video size, reusing the one padded for the previous transition
+        img = next_img_padded if next_img_padded is not None else pad_image_to_fit(images[i], FRAME_WIDTH, FRAME_HEIGHT)
+
+        # Load current audio chunk
+        if i > 0:
+            final_audio = final_audio + audio_chunks[i]
+
+        next_img_padded = None
+        next_matrix = None
+        if i < len(images) - 1:
+            next_img_padded = pad_image_to_fit(images[i + 1], FRAME_WIDTH, FRAME_HEIGHT)
+            if ken_burns:
+                next_matrix = schedules[i + 1][0]
+
+        # Get current sentence
+        current_sentence = sentences[i] + '.' if i < len(sentences) else None  # Add period back
+        write_segment(
+            out, img, current_sentence, input, segment_frame_count(audio_chunks[i]),
+            next_img=next_img_padded, transition_frames=transition_frames,
+            motion=schedules[i], next_matrix=next_matrix
+        )
+
+        # Add silence under the transition if not the last image
+        if next_img_padded is not None:
+            final_audio = final_audio + AudioSegment.silent(duration=transition_duration_ms)
+
+    # Close video writer
+    out.release()
+
+    final_audio = add_background_music(final_audio, bgm_path, bgm_reduce)
+    mux_video_and_audio(["-i", temp_video_path], final_audio, output_video_path, video_codec="mpeg4", temp_paths=[temp_video_path])
@@ -0,0 +1,21 @@
+"""
+Load modules from src/ by file path
+Importing them through the src package would also import the generators
+(diffusers, unsloth), which the unit tests do not need.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+def load_module(relative_path):
+    """Load src/<relative_path> as a standalone module"""
+    path = SRC_DIR / relative_path
+    name = path.stem
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
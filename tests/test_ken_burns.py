@@ -0,0 +1,51 @@
+"""
+Tests for the precomputed Ken Burns transform schedules
+"""
+
+import pytest
+from source_loader import load_module
+
+np = pytest.importorskip("numpy")
+
+ken_burns = load_module("utils/ken_burns.py")
+
+WIDTH = 1080
+HEIGHT = 1920
+
+@pytest.mark.parametrize("motion", range(len(ken_burns.MOTIONS)))
+def test_crop_stays_inside_image(motion):
+    matrices = ken_burns.motion_schedule(90, WIDTH, HEIGHT, motion)
+    scale = matrices[:, 0, 0]
+    # Source coordinates that land on the output frame corners
+    left = -matrices[:, 0, 2] / scale
+    right = (WIDTH - matrices[:, 0, 2]) / scale
+    top = -matrices[:, 1, 2] / scale
+    bottom = (HEIGHT - matrices[:, 1, 2]) / scale
+    assert np.all(left >= -1e-3)
+    assert np.all(right <= WIDTH + 1e-3)
+    assert np.all(top >= -1e-3)
+    assert np.all(bottom <= HEIGHT + 1e-3)
+
+@pytest.mark.parametrize("motion", range(len(ken_burns.MOTIONS)))
+def test_first_matrix_does_not_depend_on_length(motion):
+    first = ken_burns.motion_schedule(1, WIDTH, HEIGHT, motion)[0]
+    for num_frames in (2, 30, 301):
+        np.testing.assert_allclose(ken_burns.motion_schedule(num_frames, WIDTH, HEIGHT, motion)[0], first)
+
+def test_schedule_shape_and_motion():
+    matrices = ken_burns.motion_schedule(30, WIDTH, HEIGHT, 0)
+    assert matrices.shape == (30, 2, 3)
+    assert matrices.dtype == np.float32
+    # The first motion zooms in
+    assert matrices[0, 0, 0] < matrices[-1, 0, 0]
+
+def test_empty_and_single_frame_schedules():
+    assert ken_burns.motion_schedule(0, WIDTH, HEIGHT, 0).shape == (0, 2, 3)
+    assert ken_burns.motion_schedule(1, WIDTH, HEIGHT, 0).shape == (1, 2, 3)
+
+def test_motion_index_wraps_around():
+    count = len(ken_burns.MOTIONS)
+    np.testing.assert_allclose(
+        ken_burns.motion_schedule(10, WIDTH, HEIGHT, count + 2),
+        ken_burns.motion_schedule(10, WIDTH, HEIGHT, 2)
+    )
@@ -0,0 +1,49 @@
+"""
+Tests for assigning sentences to scenes and building scene prompts
+"""
+
+import pytest
+from source_loader import load_module
+
+scene_grouping = load_module("utils/scene_grouping.py")
+
+SENTENCES = [f"Did you know that fact number {i} is true." for i in range(5)]
+
+def test_group_consecutive():
+    assert scene_grouping.group_consecutive(SENTENCES, 2) == [0, 0, 1, 1, 2]
+    assert scene_grouping.group_consecutive(SENTENCES, 3) == [0, 0, 0, 1, 1]
+
+def test_group_sentences_defaults_to_one_scene_per_sentence():
+    assert scene_grouping.group_sentences(SENTENCES) == [0, 1, 2, 3, 4]
+    assert scene_grouping.group_sentences(SENTENCES, "consecutive", group_size=1) == [0, 1, 2, 3, 4]
+
+def test_group_sentences_consecutive():
+    assert scene_grouping.group_sentences(SENTENCES, "consecutive", group_size=2) == [0, 0, 1, 1, 2]
+
+def test_group_sentences_rejects_unknown_grouping():
+    with pytest.raises(ValueError):
+        scene_grouping.group_sentences(SENTENCES, "random", group_size=2)
+
+def test_scene_prompt_keeps_single_sentence_unchanged():
+    assert scene_grouping.scene_prompt([SENTENCES[0]]) == SENTENCES[0]
+
+def test_scene_prompt_strips_opener_and_period():
+    prompt = scene_grouping.scene_prompt(["Did you know that cats purr.", "did you know dogs bark."])
+    assert prompt == "cats purr; dogs bark"
+
+def test_scene_prompt_gives_every_sentence_a_share():
+    first = "Did you know that " + "the first fact is very long " * 10 + "."
+    second = "Did you know that the second fact matters too."
+    prompt = scene_grouping.scene_prompt([first, second], max_length=200)
+    parts = prompt.split("; ")
+    assert len(prompt) <= 200
+    assert len(parts) == 2
+    assert parts[0].startswith("the first fact")
+    assert parts[1] == "the second fact matters too"
+    # Cut at a word boundary within its share
+    assert len(parts[0]) <= (200 - 2) // 2
+    assert not parts[0].endswith(" ")
+
+def test_scene_prompt_skips_sentences_without_content():
+    assert scene_grouping.scene_prompt(["Did you know that.", "Hello there."]) == "Hello there"
+    assert scene_grouping.scene_prompt(["Did you know that.", "Did you know."]) == ""
@@ -0,0 +1,72 @@
+"""
+Tests for the order in which incrementally generated segments are rendered
+"""
+
+import pytest
+from source_loader import load_module
+
+segment_order = load_module("utils/segment_order.py")
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, index, image_meta, audio_meta, next_image_meta):
+        next_index = None if next_image_meta is None else next_image_meta["chunk_index"]
+        self.calls.append((index, image_meta["chunk_index"], audio_meta["chunk_index"], next_index))
+
+@pytest.fixture
+def recorder():
+    return Recorder()
+
+@pytest.fixture
+def order(recorder):
+    return segment_order.SegmentOrder(recorder)
+
+def publish(order, kind, index):
+    order.add(kind, {"chunk_index": index})
+    return order.render_ready(final=False)
+
+def test_waits_for_next_image_before_rendering_transition(order, recorder):
+    assert publish(order, "audio", 0) == []
+    assert publish(order, "image", 0) == []
+    assert publish(order, "image", 1) == [0]
+    assert recorder.calls == [(0, 0, 0, 1)]
+
+def test_waits_for_audio(order, recorder):
+    publish(order, "image", 0)
+    publish(order, "image", 1)
+    assert recorder.calls == []
+    assert publish(order, "audio", 0) == [0]
+
+def test_last_segment_renders_only_when_final(order, recorder):
+    for i in range(2):
+        publish(order, "audio", i)
+    publish(order, "image", 0)
+    publish(order, "image", 1)
+    assert order.render_ready(final=False) == []
+    assert order.render_ready(final=True) == [1]
+    assert recorder.calls == [(0, 0, 0, 1), (1, 1, 1, None)]
+
+def test_out_of_order_images_render_in_order(order, recorder):
+    # Audio first, then images in cluster order (scene 0 = sentences 0 and 3)
+    for i in range(4):
+        publish(order, "audio", i)
+    assert publish(order, "image", 0) == []
+    assert publish(order, "image", 3) == []
+    assert publish(order, "image", 2) == []
+    assert publish(order, "image", 1) == [0, 1, 2]
+    assert order.render_ready(final=True) == [3]
+    assert [call[0] for call in recorder.calls] == [0, 1, 2, 3]
+    assert [call[3] for call in recorder.calls] == [1, 2, 3, None]
+
+def test_missing_segment_blocks_later_ones(order, recorder):
+    publish(order, "image", 1)
+    publish(order, "audio", 1)
+    publish(order, "image", 2)
+    assert order.render_ready(final=True) == []
+    assert recorder.calls == []
+
+def test_rejects_unknown_asset(order):
+    with pytest.raises(ValueError):
+        order.add("video", {"chunk_index": 0})